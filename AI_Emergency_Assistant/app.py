@@ -1,20 +1,72 @@
 from flask import Flask, render_template, request, jsonify
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 import os
 from werkzeug.utils import secure_filename
-import json
+import orjson
 from asr import transcribe_audio
 from emotion import analyze_emotion
 from ner import extract_entities
 from geomapping import get_location_data
 from datetime import datetime
 import hashlib
+import time
+import uuid
+import tempfile
+import io
+import mmap
+import librosa
+import numpy as np
+import ahocorasick
 import requests as http_requests   # renamed to avoid clash with flask.request
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from psycopg2.extras import RealDictCursor, Json, register_default_jsonb
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
+import atexit
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
+import threading
+import queue
+
+try:
+    from blake3 import blake3          # SIMD / multi-core tree hash
+    HASH_ALGO = 'blake3'
+except ImportError:
+    blake3    = None                   # fall back to OpenSSL SHA-256
+    HASH_ALGO = 'sha256'
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (Rust, SIMD) instead of stdlib json."""
+
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand the encoded bytes straight to the response, skipping a decode
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.OPTIONS),
+                                        mimetype='application/json')
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100 MB
 
+# gzip JSON responses: multi-file /upload results carry full transcripts and
+# entity payloads, which compress several times over
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_ALGORITHM'] = 'gzip'
+app.config['COMPRESS_LEVEL']     = 4
+Compress(app)
+
 # ===== FOLDER SETUP =====
 BASE_DIR      = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
@@ -25,6 +77,31 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'ogg', 'flac', 'm4a', 'webm'}
 RESPONSE_APP_URL   = 'http://localhost:5020/receive_alert'
 
+# One keep-alive session for every call to the response app, instead of a new
+# TCP connection per notification. Only connection failures are retried.
+RESPONSE_APP_SESSION = http_requests.Session()
+RESPONSE_APP_SESSION.mount('http://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+# (connect, read) seconds. Notification runs on a background thread, so the
+# read timeout only has to outlast /receive_alert, which sends its Web Push
+# messages before answering; a short one would just report slow pushes as
+# alert_sent False.
+RESPONSE_APP_TIMEOUT = (1.0, 30.0)
+
+# Max number of files from a single /upload analysed at the same time
+PIPELINE_CONCURRENCY = int(os.environ.get('PIPELINE_CONCURRENCY', '5'))
+
+# Worker pool for the analysis stages. ASR and emotion work on the same decoded
+# signal independently, so they run side by side; NER starts on the transcript.
+# Each file keeps at most two stages busy, so two threads per concurrent file.
+EXECUTOR = ThreadPoolExecutor(max_workers=2 * PIPELINE_CONCURRENCY)
+
+# Whisper and the emotion features both expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+
 # ─── PostgreSQL connection config ─────────────────────────────────────────────
 # Edit these values or set environment variables.
 DB_CONFIG = {
@@ -36,13 +113,37 @@ DB_CONFIG = {
 }
 
 
+# JSONB goes through orjson both ways: Json(...) adapts dicts on the way in,
+# and JSONB columns are decoded with orjson.loads on the way out
+register_default_jsonb(loads=orjson.loads, globally=True)
+
+
+def to_jsonb(obj) -> Json:
+    """Wrap obj as a JSONB query parameter serialized by orjson."""
+    return Json(obj, dumps=lambda o: orjson.dumps(o, option=OrjsonProvider.OPTIONS).decode())
+
+
+# Connections are reused across requests instead of reconnecting every time
+POOL = ThreadedConnectionPool(minconn=2, maxconn=16, **DB_CONFIG)
+atexit.register(POOL.closeall)
+
+
+@contextmanager
 def get_db():
-    """Open and return a new database connection."""
-    return psycopg2.connect(**DB_CONFIG)
+    """Borrow a pooled connection; commit on success, roll back on error."""
+    conn = POOL.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        POOL.putconn(conn)
 
 
 def init_db():
-    """Create the results_cache table if it doesn't already exist."""
+    """Create the results_cache and jobs tables if they don't already exist."""
     with get_db() as conn:
         with conn.cursor() as cur:
             cur.execute("""
@@ -54,39 +155,159 @@ def init_db():
                     processed_at TEXT NOT NULL
                 );
             """)
+            # State of ?async=1 jobs, readable by every worker process
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id     TEXT PRIMARY KEY,
+                    status     TEXT NOT NULL,
+                    result     JSONB,
+                    updated_at TEXT NOT NULL
+                );
+            """)
         conn.commit()
-    print('✅ results_cache table verified / created.')
+    print('✅ results_cache / jobs tables verified / created.')
 
 
 # Initialise table on startup
 init_db()
 
 
+def warmup_models():
+    """
+    Load Whisper and spaCy and push one second of silence through every stage,
+    so the first real request does not pay for model loading.
+    """
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    try:
+        transcribe_audio(silence)
+        analyze_emotion(silence, SAMPLE_RATE)
+        extract_entities('warmup')
+        print('✅ Models warmed up.')
+    except Exception as e:
+        print(f"⚠️  Model warmup failed: {e}")
+
+
+warmup_models()
+
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def get_file_hash(file_stream):
-    md5 = hashlib.md5()
-    for chunk in iter(lambda: file_stream.read(8192), b''):
-        md5.update(chunk)
-    file_stream.seek(0)
-    return md5.hexdigest()
+def disk_fileno(stream):
+    """
+    File descriptor of an upload stream that werkzeug already spilled to disk,
+    or None. Small uploads still held in memory are left there, since calling
+    fileno() on a SpooledTemporaryFile would force them out to disk.
+    """
+    if isinstance(stream, tempfile.SpooledTemporaryFile) and not stream._rolled:
+        return None
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def save_and_hash(stream, dest_path: str) -> str:
+    """
+    Copy an upload stream to dest_path and hash it in the same pass
+    (BLAKE3, or SHA-256 without the blake3 package). Returns the hex digest.
+    """
+    h = blake3() if blake3 else hashlib.sha256()
+
+    # Large uploads are already in a temp file: map it and hand the page cache
+    # straight to the hash and the write, with no Python-level chunk copies
+    fileno = disk_fileno(stream)
+    if fileno is not None and os.fstat(fileno).st_size > 0:
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mm, open(dest_path, 'wb') as out:
+            h.update(mm)
+            out.write(mm)
+        return h.hexdigest()
+
+    with open(dest_path, 'wb') as out:
+        # 1 MiB reads keep the Python loop overhead negligible on large uploads
+        for chunk in iter(lambda: stream.read(1 << 20), b''):
+            h.update(chunk)
+            out.write(chunk)
+    return h.hexdigest()
+
+
+def unique_suffix() -> str:
+    """Epoch seconds plus a random tag: sortable, and unique even for
+    recordings or same-named uploads that arrive within the same second."""
+    return f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+
+def spool_upload(file_storage):
+    """Save an upload under a temporary name in uploads/. Returns (temp_path, file_hash)."""
+    fd, temp_path = tempfile.mkstemp(suffix='.part', dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
+    try:
+        return temp_path, save_and_hash(file_storage.stream, temp_path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+# ─── In-process result index ─────────────────────────────────────────────────
+# hash -> result for recently seen files, so repeated uploads skip the DB
+# round-trip. results_cache stays the source of truth (UNIQUE btree on file_hash).
+RESULT_INDEX      = OrderedDict()
+RESULT_INDEX_MAX  = 1024
+RESULT_INDEX_LOCK = threading.Lock()
+
+
+def remember_result(result: dict):
+    """Add a result to the in-process index, evicting the oldest entries."""
+    file_hash = result.get('file_hash')
+    if not file_hash:
+        return
+    with RESULT_INDEX_LOCK:
+        RESULT_INDEX[file_hash] = dict(result)
+        RESULT_INDEX.move_to_end(file_hash)
+        while len(RESULT_INDEX) > RESULT_INDEX_MAX:
+            RESULT_INDEX.popitem(last=False)
+
+
+def find_existing_results(file_hashes) -> dict:
+    """
+    Look up cached results for several file hashes at once.
+    Hashes not in the in-process index are fetched with a single query.
+
+    Returns:
+        dict: file_hash -> result dict, for the hashes that were found
+    """
+    found, missing = {}, []
+    with RESULT_INDEX_LOCK:
+        for file_hash in file_hashes:
+            hit = RESULT_INDEX.get(file_hash)
+            if hit is None:
+                missing.append(file_hash)
+            else:
+                RESULT_INDEX.move_to_end(file_hash)
+                found[file_hash] = dict(hit)
+    for file_hash in found:
+        print(f"♻️  Duplicate — returning indexed result for hash {file_hash[:8]}...")
+
+    if missing:
+        with get_db() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    "SELECT file_hash, result FROM results_cache WHERE file_hash = ANY(%s)",
+                    (missing,)
+                )
+                rows = cur.fetchall()
+        for row in rows:
+            print(f"♻️  Duplicate — returning cached result for hash {row['file_hash'][:8]}...")
+            result = dict(row['result'])
+            remember_result(result)
+            found[row['file_hash']] = dict(result)
+    return found
 
 
 def find_existing_result(file_hash: str):
     """Return cached result dict for the given file hash, or None."""
-    with get_db() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(
-                "SELECT result FROM results_cache WHERE file_hash = %s",
-                (file_hash,)
-            )
-            row = cur.fetchone()
-    if row:
-        print(f"♻️  Duplicate — returning cached result for hash {file_hash[:8]}...")
-        return dict(row['result'])
-    return None
+    return find_existing_results([file_hash]).get(file_hash)
 
 
 def save_result_to_db(result: dict):
@@ -102,36 +323,74 @@ def save_result_to_db(result: dict):
             """, (
                 result.get('file_hash'),
                 result.get('filename'),
-                json.dumps(result),
+                to_jsonb(result),
                 result.get('processed_at', datetime.now().isoformat())
             ))
         conn.commit()
+    remember_result(result)
     print(f"Result saved to DB for file: {result.get('filename')}")
 
 
-def calculate_priority(entities, emotion):
-    priority_keywords = {
-        'critical': ['fire', 'shooting', 'explosion', 'heart attack', 'stroke',
-                     'bleeding', 'unconscious', 'dying', 'weapon', 'gun'],
-        'high':     ['accident', 'injury', 'assault', 'robbery', 'burglary',
-                     'chest pain', 'difficulty breathing', 'severe pain'],
-        'medium':   ['theft', 'suspicious', 'noise complaint', 'minor injury', 'disturbance'],
-        'low':      ['lost', 'found', 'information', 'general inquiry']
-    }
-    text_lower = entities.get('full_text', '').lower()
-
-    for kw in priority_keywords['critical']:
-        if kw in text_lower:
-            return 1
-    for kw in priority_keywords['high']:
-        if kw in text_lower:
-            return 2
-    if emotion in ['angry', 'fear', 'sad', 'PANIC']:
+# ─── Priority keywords ───────────────────────────────────────────────────────
+PRIORITY_KEYWORDS = {
+    1: ['fire', 'shooting', 'explosion', 'heart attack', 'stroke',
+        'bleeding', 'unconscious', 'dying', 'weapon', 'gun'],             # critical
+    2: ['accident', 'injury', 'assault', 'robbery', 'burglary',
+        'chest pain', 'difficulty breathing', 'severe pain'],             # high
+    3: ['theft', 'suspicious', 'noise complaint', 'minor injury', 'disturbance'],  # medium
+    4: ['lost', 'found', 'information', 'general inquiry'],              # low
+}
+DISTRESS_EMOTIONS = frozenset({'angry', 'fear', 'sad', 'PANIC'})
+
+# One Aho-Corasick automaton finds every keyword in a single pass over the text
+PRIORITY_AUTOMATON = ahocorasick.Automaton()
+for _level, _keywords in PRIORITY_KEYWORDS.items():
+    for _kw in _keywords:
+        PRIORITY_AUTOMATON.add_word(_kw, _level)
+PRIORITY_AUTOMATON.make_automaton()
+
+
+def calculate_priority(transcript, emotion):
+    text_lower = transcript.lower()
+
+    level = 4
+    for _, kw_level in PRIORITY_AUTOMATON.iter(text_lower):
+        if kw_level < level:
+            level = kw_level
+            if level == 1:
+                break
+
+    if level <= 2:
+        return level
+    if emotion in DISTRESS_EMOTIONS:
         return 2
-    for kw in priority_keywords['medium']:
-        if kw in text_lower:
-            return 3
-    return 4
+    return level
+
+
+def load_audio(filepath: str):
+    """Decode an audio file once to 16 kHz mono float32 for every analysis stage."""
+    try:
+        audio, _ = librosa.load(filepath, sr=SAMPLE_RATE, mono=True)
+    except Exception as e:
+        # audioread errors often carry no message; repr keeps the exception type
+        raise Exception(f"Audio decoding failed: {e!r}")
+    return audio
+
+
+def run_pipeline(filepath: str):
+    """
+    Run ASR, emotion and NER for one audio file.
+    Returns (transcript, emotion, entities).
+    """
+    audio   = load_audio(filepath)
+    asr_fut = EXECUTOR.submit(transcribe_audio, audio)
+    emo_fut = EXECUTOR.submit(analyze_emotion, audio, SAMPLE_RATE)
+
+    transcript = asr_fut.result()
+    ner_fut    = EXECUTOR.submit(extract_entities, transcript)
+    emotion    = emo_fut.result()
+    entities   = ner_fut.result()
+    return transcript, emotion, entities
 
 
 def notify_response_app(result: dict) -> dict:
@@ -141,10 +400,10 @@ def notify_response_app(result: dict) -> dict:
     Silently ignores any connection error so the emergency app keeps working.
     """
     try:
-        resp = http_requests.post(
+        resp = RESPONSE_APP_SESSION.post(
             RESPONSE_APP_URL,
             json=result,
-            timeout=5
+            timeout=RESPONSE_APP_TIMEOUT
         )
         data = resp.json()
         print(f"📢 Response app notified — alert_sent={data.get('alert_sent')}, "
@@ -155,6 +414,264 @@ def notify_response_app(result: dict) -> dict:
         return {'alert_sent': False, 'matched_centers': [], 'notifications_sent': 0}
 
 
+# ─── Background notifications ────────────────────────────────────────────────
+# The response app is notified off the request path so a slow or unreachable
+# response app never delays the analysis result. Clients poll
+# /notify_status/<file_hash> for the outcome.
+NOTIFY_Q          = queue.Queue()
+NOTIFY_STATUS     = OrderedDict()   # file_hash -> {'pending', 'alert_sent', 'notified_centers'}
+NOTIFY_STATUS_MAX = 1024
+NOTIFY_LOCK       = threading.Lock()
+
+
+def set_notify_status(file_hash: str, status: dict):
+    with NOTIFY_LOCK:
+        NOTIFY_STATUS[file_hash] = status
+        NOTIFY_STATUS.move_to_end(file_hash)
+        while len(NOTIFY_STATUS) > NOTIFY_STATUS_MAX:
+            NOTIFY_STATUS.popitem(last=False)
+
+
+def notify_worker():
+    """Drain NOTIFY_Q: POST each result and record what the response app did."""
+    while True:
+        result     = NOTIFY_Q.get()
+        alert_info = notify_response_app(result)
+        outcome    = {
+            'alert_sent':       alert_info.get('alert_sent', False),
+            'notified_centers': alert_info.get('matched_centers', []),
+        }
+        set_notify_status(result['file_hash'], {'pending': False, **outcome})
+
+        # Persist the outcome so every worker process can answer /notify_status
+        try:
+            with get_db() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "UPDATE results_cache SET result = result || %s::jsonb WHERE file_hash = %s",
+                        (to_jsonb(outcome), result['file_hash'])
+                    )
+        except Exception as e:
+            print(f"⚠️  Could not store notification outcome: {e}")
+        NOTIFY_Q.task_done()
+
+
+threading.Thread(target=notify_worker, daemon=True).start()
+
+
+def queue_notification(result: dict, stored_outcome: bool = False) -> dict:
+    """
+    Queue a result for the response app and mark it as pending. Returns result.
+
+    stored_outcome: the results_cache row may still hold the outcome of an
+    earlier notification (duplicate uploads). It is cleared first, so workers
+    that answer /notify_status from the row report pending, not the old outcome.
+    """
+    set_notify_status(result['file_hash'], {'pending': True})
+    if stored_outcome:
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE results_cache
+                    SET result = result - 'alert_sent' - 'notified_centers'
+                    WHERE file_hash = %s
+                """, (result['file_hash'],))
+    NOTIFY_Q.put(dict(result))
+    result['alert_sent']       = False
+    result['notified_centers'] = []
+    result['notify_pending']   = True
+    return result
+
+
+# ─── Background jobs ─────────────────────────────────────────────────────────
+# With ?async=1, /upload and /record return job ids straight away and the
+# analysis runs here; clients poll /result/<job_id>. The job id is the file
+# hash. Each job's state (pending / done / error) is also kept in the jobs
+# table, so a poll that lands on another worker process gets the same answer.
+# Finished results live in results_cache; the table only holds error dicts.
+JOB_POOL  = ThreadPoolExecutor(max_workers=PIPELINE_CONCURRENCY)
+JOBS      = OrderedDict()   # job_id -> Future of the result dict
+JOBS_MAX  = 1024
+JOBS_LOCK = threading.Lock()
+
+# A job still pending this long after it started lost its worker (killed or
+# restarted) and is reported as failed. Rows older than JOB_TTL are deleted.
+JOB_STALE_SECS  = int(os.environ.get('JOB_STALE_SECS', '900'))
+JOB_TTL         = 24 * 3600   # seconds
+JOB_PRUNE_EVERY = 600         # seconds between sweeps in one process
+jobs_pruned_at  = 0.0
+
+
+def wants_async() -> bool:
+    return request.args.get('async') == '1'
+
+
+def track_job(job_id: str, future: Future):
+    with JOBS_LOCK:
+        JOBS[job_id] = future
+        JOBS.move_to_end(job_id)
+        while len(JOBS) > JOBS_MAX:
+            JOBS.popitem(last=False)
+
+
+def save_job_state(job_id: str, status: str, result: dict = None):
+    """Record a job's status ('pending', 'done' or 'error') and its error result."""
+    with get_db() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO jobs (job_id, status, result, updated_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (job_id) DO UPDATE
+                    SET status     = EXCLUDED.status,
+                        result     = EXCLUDED.result,
+                        updated_at = EXCLUDED.updated_at
+            """, (
+                job_id,
+                status,
+                to_jsonb(result) if status == 'error' else None,
+                datetime.now().isoformat()
+            ))
+
+
+def prune_jobs():
+    """Delete job rows older than JOB_TTL, at most once every JOB_PRUNE_EVERY seconds."""
+    global jobs_pruned_at
+    now = time.monotonic()
+    if now - jobs_pruned_at < JOB_PRUNE_EVERY:
+        return
+    jobs_pruned_at = now
+    cutoff = datetime.fromtimestamp(time.time() - JOB_TTL).isoformat()
+    try:
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM jobs WHERE updated_at < %s", (cutoff,))
+    except Exception as e:
+        print(f"⚠️  Could not prune old jobs: {e}")
+
+
+def run_job(job_id: str, fn, *args) -> dict:
+    """Run one job on JOB_POOL and publish its outcome to the jobs table."""
+    try:
+        save_job_state(job_id, 'pending')   # staleness counts from the actual start
+    except Exception as e:
+        print(f"⚠️  Could not store job state for {job_id[:8]}: {e}")
+    try:
+        result = fn(*args)
+    except Exception as e:
+        result = {'error': str(e), 'processed_at': datetime.now().isoformat()}
+    try:
+        save_job_state(job_id, 'error' if 'error' in result else 'done', result)
+    except Exception as e:
+        print(f"⚠️  Could not store job state for {job_id[:8]}: {e}")
+    return result
+
+
+def start_job(job_id: str, fn, *args):
+    """Mark a job pending for every worker, then run it in the background."""
+    prune_jobs()
+    save_job_state(job_id, 'pending')
+    track_job(job_id, JOB_POOL.submit(run_job, job_id, fn, *args))
+
+
+def finish_job(job_id: str, result: dict):
+    """Register a job whose result was already known, e.g. a duplicate upload."""
+    save_job_state(job_id, 'done', result)
+    future = Future()
+    future.set_result(result)
+    track_job(job_id, future)
+
+
+def place_upload(temp_path: str, filename: str) -> str:
+    """
+    Move a spooled upload into uploads/ under filename, or under filename with
+    a unique suffix if that name is taken. Returns the final path.
+
+    os.link refuses to overwrite, so two uploads with the same name (in this
+    request, another request or another worker) can never claim the same file.
+    """
+    base, ext = os.path.splitext(filename)
+    candidate = filename
+    while True:
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], candidate)
+        try:
+            os.link(temp_path, filepath)
+        except FileExistsError:
+            candidate = f"{base}_{unique_suffix()}{ext}"
+            continue
+        os.remove(temp_path)
+        return filepath
+
+
+def process_upload(filepath: str, file_hash: str) -> dict:
+    """
+    Analyse one placed upload that is not in the cache and return its result dict.
+    """
+    filename = os.path.basename(filepath)
+
+    try:
+        transcript, emotion, entities = run_pipeline(filepath)
+        priority = calculate_priority(transcript, emotion)
+
+        result = {
+            'filename':     filename,
+            'transcript':   transcript,
+            'emotion':      emotion,
+            'entities':     entities,
+            'priority':     priority,
+            'file_hash':    file_hash,
+            'hash_algo':    HASH_ALGO,
+            'processed_at': datetime.now().isoformat()
+        }
+
+        save_result_to_db(result)
+
+        # ── Notify Response App (in the background) ──
+        return queue_notification(result)
+
+    except Exception as e:
+        print(f"Error processing {filename}: {e}")
+        return {
+            'filename':     filename,
+            'error':        str(e),
+            'processed_at': datetime.now().isoformat()
+        }
+
+
+def process_recording(filepath: str, file_hash: str) -> dict:
+    """
+    Analyse a live recording saved at filepath and return its result dict.
+    On failure the recording is deleted and the dict carries an 'error'.
+    """
+    try:
+        transcript, emotion, entities = run_pipeline(filepath)
+        priority = calculate_priority(transcript, emotion)
+
+        result = {
+            'filename':     'Live Recording',
+            'transcript':   transcript,
+            'emotion':      emotion,
+            'entities':     entities,
+            'priority':     priority,
+            'file_hash':    file_hash,
+            'hash_algo':    HASH_ALGO,
+            'processed_at': datetime.now().isoformat()
+        }
+
+        save_result_to_db(result)
+
+        # ── Notify Response App (in the background) ──
+        return queue_notification(result)
+
+    except Exception as e:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        return {
+            'filename':     'Live Recording',
+            'error':        str(e),
+            'processed_at': datetime.now().isoformat()
+        }
+
+
 # ─── Routes ──────────────────────────────────────────────────────────────────
 @app.route('/')
 def index():
@@ -166,71 +683,58 @@ def upload_files():
     if 'files[]' not in request.files:
         return jsonify({'error': 'No files provided'}), 400
 
-    files   = request.files.getlist('files[]')
-    results = []
+    files     = request.files.getlist('files[]')
+    batch     = {}   # file_hash -> (temp_path, filename)
+    submitted = []   # file_hash of every accepted file, in upload order
 
     for file in files:
         if not (file and allowed_file(file.filename)):
             continue
 
-        file_hash = get_file_hash(file.stream)
-
-        # ── Duplicate file: still notify response app with cached result ──
-        cached = find_existing_result(file_hash)
-        if cached:
-            alert_info = notify_response_app(cached)
-            cached['alert_sent']       = alert_info.get('alert_sent', False)
-            cached['notified_centers'] = alert_info.get('matched_centers', [])
-            results.append(cached)
+        # Written to disk and hashed in one pass; the same audio twice
+        # in one upload is only analysed once, but still gets its own entry
+        temp_path, file_hash = spool_upload(file)
+        submitted.append(file_hash)
+        if file_hash in batch:
+            os.remove(temp_path)
             continue
 
-        # ── New file: save to uploads/ ────────────────────────────────────
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-
-        if os.path.exists(filepath):
-            base, ext = os.path.splitext(filename)
-            ts        = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename  = f"{base}_{ts}{ext}"
-            filepath  = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-
-        file.save(filepath)
-
-        try:
-            transcript = transcribe_audio(filepath)
-            emotion    = analyze_emotion(filepath)
-            entities   = extract_entities(transcript)
-            entities['full_text'] = transcript
-
-            priority = calculate_priority(entities, emotion)
-
-            result = {
-                'filename':     filename,
-                'transcript':   transcript,
-                'emotion':      emotion,
-                'entities':     entities,
-                'priority':     priority,
-                'file_hash':    file_hash,
-                'processed_at': datetime.now().isoformat()
-            }
-
-            # ── Notify Response App ──
-            alert_info = notify_response_app(result)
-            result['alert_sent']       = alert_info.get('alert_sent', False)
-            result['notified_centers'] = alert_info.get('matched_centers', [])
-
-            save_result_to_db(result)
-            results.append(result)
-
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-            error_result = {
-                'filename':     filename,
-                'error':        str(e),
-                'processed_at': datetime.now().isoformat()
-            }
-            results.append(error_result)
-
+        batch[file_hash] = (temp_path, secure_filename(file.filename))
+
+    if not batch:
+        return jsonify([])
+
+    # ── Duplicate files: one cache lookup for the whole upload, and the
+    #    response app is still notified with the cached result ──
+    by_hash = {}   # file_hash -> result dict
+    for file_hash, cached in find_existing_results(list(batch)).items():
+        temp_path, _ = batch.pop(file_hash)
+        os.remove(temp_path)
+        by_hash[file_hash] = queue_notification(cached, stored_outcome=True)
+
+    # ── New files: keep them in uploads/ under their final names ──
+    placed = {file_hash: place_upload(temp_path, filename)
+              for file_hash, (temp_path, filename) in batch.items()}
+
+    if wants_async():
+        names = {}   # file_hash -> filename the job reports under
+        for file_hash, result in by_hash.items():
+            finish_job(file_hash, result)
+            names[file_hash] = result['filename']
+        for file_hash, filepath in placed.items():
+            start_job(file_hash, process_upload, filepath, file_hash)
+            names[file_hash] = os.path.basename(filepath)
+        return jsonify([{'job_id': file_hash, 'filename': names[file_hash]}
+                        for file_hash in submitted]), 202
+
+    if placed:
+        with ThreadPoolExecutor(max_workers=min(PIPELINE_CONCURRENCY, len(placed))) as pool:
+            futures = {file_hash: pool.submit(process_upload, filepath, file_hash)
+                       for file_hash, filepath in placed.items()}
+            by_hash.update((file_hash, f.result()) for file_hash, f in futures.items())
+
+    # One entry per submitted file; repeats of the same audio share its result
+    results = [by_hash[file_hash] for file_hash in submitted]
     results.sort(key=lambda x: x.get('priority', 999))
     return jsonify(results)
 
@@ -240,53 +744,94 @@ def record_audio():
     if 'audio' not in request.files:
         return jsonify({'error': 'No audio file provided'}), 400
 
-    audio_file = request.files['audio']
-    file_hash  = get_file_hash(audio_file.stream)
+    audio_file           = request.files['audio']
+    temp_path, file_hash = spool_upload(audio_file)
 
     # ── Duplicate recording: still notify response app ──
     cached = find_existing_result(file_hash)
     if cached:
         print("♻️  Duplicate recording — returning cached result")
-        alert_info = notify_response_app(cached)
-        cached['alert_sent']       = alert_info.get('alert_sent', False)
-        cached['notified_centers'] = alert_info.get('matched_centers', [])
-        return jsonify(cached)
+        os.remove(temp_path)
+        result = queue_notification(cached, stored_outcome=True)
+        if wants_async():
+            finish_job(file_hash, result)
+            return jsonify({'job_id': file_hash, 'filename': result['filename']}), 202
+        return jsonify(result)
 
-    timestamp          = datetime.now().strftime('%Y%m%d_%H%M%S')
-    recording_filename = f"recording_{timestamp}.webm"
+    recording_filename = f"recording_{unique_suffix()}.webm"
     filepath           = os.path.join(app.config['UPLOAD_FOLDER'], recording_filename)
-    audio_file.save(filepath)
+    os.replace(temp_path, filepath)
 
-    try:
-        transcript = transcribe_audio(filepath)
-        emotion    = analyze_emotion(filepath)
-        entities   = extract_entities(transcript)
-        entities['full_text'] = transcript
+    if wants_async():
+        start_job(file_hash, process_recording, filepath, file_hash)
+        return jsonify({'job_id': file_hash, 'filename': 'Live Recording'}), 202
 
-        priority = calculate_priority(entities, emotion)
+    result = process_recording(filepath, file_hash)
+    if 'error' in result:
+        return jsonify({'error': result['error']}), 500
+    return jsonify(result)
 
-        result = {
-            'filename':     'Live Recording',
-            'transcript':   transcript,
-            'emotion':      emotion,
-            'entities':     entities,
-            'priority':     priority,
-            'file_hash':    file_hash,
-            'processed_at': datetime.now().isoformat()
-        }
 
-        # ── Notify Response App ──
-        alert_info = notify_response_app(result)
-        result['alert_sent']       = alert_info.get('alert_sent', False)
-        result['notified_centers'] = alert_info.get('matched_centers', [])
-
-        save_result_to_db(result)
-        return jsonify(result)
-
-    except Exception as e:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-        return jsonify({'error': str(e)}), 500
+@app.route('/result/<job_id>', methods=['GET'])
+def job_result(job_id):
+    """
+    Result of a job started with ?async=1: 202 while it is still running,
+    otherwise the result dict (which carries an 'error' if the job failed).
+    """
+    with JOBS_LOCK:
+        future = JOBS.get(job_id)
+    if future is not None:
+        if not future.done():
+            return jsonify({'pending': True}), 202
+        return jsonify(future.result())
+
+    # Started by another worker process: read the state it stored
+    with get_db() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT status, result, updated_at FROM jobs WHERE job_id = %s", (job_id,))
+            row = cur.fetchone()
+    if not row:
+        return jsonify({'error': 'Unknown job'}), 404
+    if row['status'] == 'pending':
+        age = (datetime.now() - datetime.fromisoformat(row['updated_at'])).total_seconds()
+        if age < JOB_STALE_SECS:
+            return jsonify({'pending': True}), 202
+        return jsonify({'error': 'Job was lost before it finished; please upload the file again'})
+    if row['status'] == 'error':
+        return jsonify(row['result'])
+
+    result = find_existing_result(job_id)
+    if result is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(result)
+
+
+@app.route('/notify_status/<file_hash>', methods=['GET'])
+def notify_status(file_hash):
+    """Outcome of the background response-app notification for one result."""
+    with NOTIFY_LOCK:
+        status = NOTIFY_STATUS.get(file_hash)
+    if status is not None:
+        return jsonify(status)
+
+    # Queued by another worker process: read the outcome it stored
+    with get_db() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT result->'alert_sent'       AS alert_sent,
+                       result->'notified_centers' AS notified_centers
+                FROM results_cache WHERE file_hash = %s
+            """, (file_hash,))
+            row = cur.fetchone()
+    if not row:
+        return jsonify({'error': 'Unknown file hash'}), 404
+    if row['alert_sent'] is None:
+        return jsonify({'pending': True})
+    return jsonify({
+        'pending':          False,
+        'alert_sent':       row['alert_sent'],
+        'notified_centers': row['notified_centers'] or []
+    })
 
 
 @app.route('/geocode', methods=['POST'])
@@ -306,4 +851,5 @@ def geocode():
 if __name__ == '__main__':
     print(f"📁 Uploads folder : {UPLOAD_FOLDER}")
     print(f"🔗 Response App   : {RESPONSE_APP_URL}")
-    app.run(debug=True, port=5006, host='0.0.0.0')
+    # Development server only; use `gunicorn -c gunicorn_conf.py app:app` in production
+    app.run(port=5006, host='0.0.0.0')
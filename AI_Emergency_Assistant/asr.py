@@ -1,28 +1,44 @@
-import whisper
-import torch
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+import os
+import threading
+import ctranslate2
 
 # Load Whisper model (using base model for lightweight performance)
 model = None
+batched_model = None
+# Concurrent first requests must not each load their own copy of the model
+load_lock = threading.Lock()
 
 
 def load_model():
-    global model
-    if model is None:
+    global model, batched_model
+    if batched_model is not None:
+        return batched_model
+    with load_lock:
+        if batched_model is not None:
+            return batched_model
         # Use 'base' model for balance between speed and accuracy
-        # Options: 'tiny', 'base', 'small', 'medium', 'large'
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Loading Whisper model on {device}...")
-        model = whisper.load_model("base", device=device)
+        # Options: 'tiny', 'base', 'small', 'medium', 'large-v3'
+        # Ask CTranslate2 itself: a CPU-only torch wheel would hide the GPU
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        # INT8 weights (CTranslate2); activations stay FP16 on the GPU.
+        # WHISPER_COMPUTE_TYPE overrides it, e.g. "float32" to compare accuracy.
+        compute_type = os.environ.get("WHISPER_COMPUTE_TYPE") or (
+            "int8_float16" if device == "cuda" else "int8")
+        print(f"Loading Whisper model on {device} ({compute_type})...")
+        model = WhisperModel("base", device=device, compute_type=compute_type)
+        # Decodes the VAD-split chunks of one recording as a single batch
+        batched_model = BatchedInferencePipeline(model=model)
         print("Whisper model loaded successfully!")
-    return model
+        return batched_model
 
 
-def transcribe_audio(audio_path):
+def transcribe_audio(audio):
     """
-    Transcribe audio file to text using OpenAI Whisper
+    Transcribe audio file to text using Whisper (faster-whisper / CTranslate2)
 
     Args:
-        audio_path: Path to the audio file
+        audio: Path to the audio file, or a 16 kHz mono float32 signal
 
     Returns:
         str: Transcribed text
@@ -31,13 +47,13 @@ def transcribe_audio(audio_path):
         whisper_model = load_model()
 
         # Transcribe the audio
-        result = whisper_model.transcribe(audio_path, language='en', fp16=False)
+        segments, _ = whisper_model.transcribe(audio, language='en', batch_size=8)
 
-        transcript = result['text'].strip()
+        transcript = "".join(segment.text for segment in segments).strip()
         print(f"Transcription: {transcript}")
 
         return transcript
 
     except Exception as e:
         print(f"Error in transcription: {str(e)}")
-        raise Exception(f"Transcription failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Transcription failed: {str(e)}")
\ No newline at end of file
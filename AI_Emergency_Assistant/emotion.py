@@ -1,3 +1,4 @@
+import functools
 import librosa
 import numpy as np
 
@@ -13,13 +14,44 @@ EMOTION_MAP = {
 }
 
 
-def analyze_emotion(audio_path):
+def frame_rms_zcr(y, frame_length=2048, hop_length=512):
+    """
+    Per-frame RMS energy and zero-crossing rate, matching
+    librosa.feature.rms(y=y) and librosa.feature.zero_crossing_rate(y)
+    with their default centred framing.
+
+    Both are computed from running sums over the whole signal, so each
+    sample is touched once instead of once per overlapping frame.
+
+    Returns:
+        tuple: (rms, zcr) arrays with one value per frame
+    """
+    half = frame_length // 2
+    n_frames = 1 + (len(y) + 2 * half - frame_length) // hop_length
+    starts = np.arange(n_frames) * hop_length
+
+    # RMS: mean of squares over zero-padded frames
+    y_pad = np.pad(y, half, mode="constant").astype(np.float64)
+    sq_sum = np.concatenate(([0.0], np.cumsum(y_pad * y_pad)))
+    rms = np.sqrt((sq_sum[starts + frame_length] - sq_sum[starts]) / frame_length)
+
+    # ZCR: sign changes inside edge-padded frames (|x| <= 1e-10 counts as zero)
+    y_pad = np.pad(y, half, mode="edge")
+    sign = np.signbit(np.where(np.abs(y_pad) <= 1e-10, 0, y_pad))
+    cross_sum = np.concatenate(([0], np.cumsum(sign[1:] != sign[:-1])))
+    zcr = (cross_sum[starts + frame_length - 1] - cross_sum[starts]) / frame_length
+
+    return rms, zcr
+
+
+def analyze_emotion(audio, sr=16000):
     """
     Analyze emotion from audio file using audio features
     Tuned specifically for emergency call scenarios
 
     Args:
-        audio_path: Path to the audio file
+        audio: Path to the audio file, or an already decoded mono signal
+        sr: Sample rate of a decoded signal (ignored for paths)
 
     Returns:
         str: Mapped emotion category (PANIC, DISTRESS, or CALM)
@@ -27,63 +59,62 @@ def analyze_emotion(audio_path):
     try:
         print("Analyzing emotion from audio features...")
 
-        # Load audio
-        y, sr = librosa.load(audio_path, sr=16000, duration=10)
+        # Load audio (only the first 10 seconds are analysed)
+        if isinstance(audio, str):
+            y, sr = librosa.load(audio, sr=16000, duration=10)
+        else:
+            y = audio[:10 * sr]
 
         # Extract audio features
+        # Cheap time-domain features are computed up front; the STFT-based
+        # ones are only computed when a rule actually reaches them.
+
+        rms, zcr_frames = frame_rms_zcr(y)
 
         # 1. Energy/Intensity (loudness)
-        rms = librosa.feature.rms(y=y)
         energy = np.mean(rms)
         energy_std = np.std(rms)  # Energy variation
 
         # 2. Zero crossing rate (voice quality/tension indicator)
-        zcr = np.mean(librosa.feature.zero_crossing_rate(y))
+        zcr = np.mean(zcr_frames)
 
-        # 3. Spectral centroid (brightness/pitch of sound)
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-        spectral_std = np.std(librosa.feature.spectral_centroid(y=y, sr=sr))
-
-        # 4. Tempo (speed of speech)
-        try:
-            tempo = librosa.feature.tempo(y=y, sr=sr)[0]
-        except:
-            tempo = 100  # default if tempo detection fails
-
-        # 5. Pitch variation
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch_values = []
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            if pitch > 0:
-                pitch_values.append(pitch)
-
-        pitch_variation = np.std(pitch_values) if len(pitch_values) > 0 else 0
-        pitch_mean = np.mean(pitch_values) if len(pitch_values) > 0 else 0
-
-        # 6. Spectral rolloff (frequency distribution)
-        spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr))
+        @functools.cache
+        def spectrum():
+            # One magnitude STFT shared by every spectral feature below
+            return np.abs(librosa.stft(y))
 
-        print(f"Audio features - Energy: {energy:.4f} (std: {energy_std:.4f}), ZCR: {zcr:.4f}, "
-              f"Spectral Centroid: {spectral_centroid:.2f}, Tempo: {tempo:.2f}, "
-              f"Pitch Variation: {pitch_variation:.2f}")
+        # 3. Spectral centroid (brightness/pitch of sound)
+        @functools.cache
+        def spectral_centroid():
+            return np.mean(librosa.feature.spectral_centroid(S=spectrum(), sr=sr))
+
+        # 4. Pitch variation
+        @functools.cache
+        def pitch_variation():
+            pitches, magnitudes = librosa.piptrack(S=spectrum(), sr=sr)
+            # Strongest pitch candidate of every frame, picked in one vectorized step
+            index = magnitudes.argmax(axis=0)
+            pitch_per_frame = pitches[index, np.arange(pitches.shape[1])]
+            pitch_values = pitch_per_frame[pitch_per_frame > 0]
+            return np.std(pitch_values) if pitch_values.size > 0 else 0
 
         # Enhanced rule-based emotion detection for emergency calls
-        # These thresholds are tuned for emergency situations
+        # These thresholds are tuned for emergency situations.
+        # Cheap conditions come first in each rule so `and` short-circuits
+        # before the spectral features are needed.
 
         raw_emotion = "neutral"  # default
 
         # Fear detection (high ZCR, moderate-high energy, high pitch variation)
-        if zcr > 0.19 and energy > 0.065 and pitch_variation > 400:
+        if zcr > 0.19 and energy > 0.065 and pitch_variation() > 400:
             raw_emotion = "fear"
 
         # Angry detection (high energy, high spectral centroid, high variation)
-        elif energy > 0.09 and spectral_centroid > 2200 and energy_std > 0.015:
+        elif energy > 0.09 and energy_std > 0.015 and spectral_centroid() > 2200:
             raw_emotion = "anger"
 
         # Sad/distressed detection (lower energy, moderate spectral features)
-        elif energy < 0.08 and spectral_centroid < 1800 and pitch_variation < 600:
+        elif energy < 0.08 and spectral_centroid() < 1800 and pitch_variation() < 600:
             raw_emotion = "sadness"
 
         # Surprised/shocked detection (high ZCR, variable energy)
@@ -91,7 +122,7 @@ def analyze_emotion(audio_path):
             raw_emotion = "surprise"
 
         # Happy/relieved detection (moderate-high energy, higher pitch, stable)
-        elif energy > 0.085 and spectral_centroid > 2100 and energy_std < 0.018:
+        elif energy > 0.085 and energy_std < 0.018 and spectral_centroid() > 2100:
             raw_emotion = "happiness"
 
         # Calm detection (low energy, low variation)
@@ -106,6 +137,11 @@ def analyze_emotion(audio_path):
         else:
             raw_emotion = "neutral"
 
+        centroid_str = f"{spectral_centroid():.2f}" if spectral_centroid.cache_info().currsize else "skipped"
+        pitch_str = f"{pitch_variation():.2f}" if pitch_variation.cache_info().currsize else "skipped"
+        print(f"Audio features - Energy: {energy:.4f} (std: {energy_std:.4f}), ZCR: {zcr:.4f}, "
+              f"Spectral Centroid: {centroid_str}, Pitch Variation: {pitch_str}")
+
         # Map the detected emotion to simplified category
         mapped_emotion = EMOTION_MAP.get(raw_emotion, "CALM")
 
@@ -115,4 +151,4 @@ def analyze_emotion(audio_path):
     except Exception as e:
         print(f"Error in emotion analysis: {str(e)}")
         # Return CALM as safe fallback
-        return "CALM"
\ No newline at end of file
+        return "CALM"
\ No newline at end of file
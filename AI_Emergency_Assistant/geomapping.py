@@ -1,20 +1,244 @@
 import requests
-from typing import Dict, List
+import hashlib
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional
 import time
 import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import orjson
+
+try:
+    import redis                       # optional shared cache across workers
+except ImportError:
+    redis = None
+
+
+# ─── HTTP session ────────────────────────────────────────────────────────────
+# One keep-alive session for Nominatim and Overpass, so repeated lookups reuse
+# TLS connections instead of handshaking every time. Every request on it is a
+# hedged attempt, so it never retries by itself: hedged() starts the next
+# attempt instead, and a retried read timeout would only stretch the tail.
+SESSION = requests.Session()
+SESSION.headers['User-Agent'] = 'EmergencyCallAssistant/1.0'
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(total=0, read=0, connect=0, status=0)
+))
+
+
+# ─── Lookup cache ────────────────────────────────────────────────────────────
+# Geocoding and nearby-service lookups are slow network calls whose answers
+# barely change, so they are cached per process and, when REDIS_URL is set,
+# in Redis so every worker shares them. Failed lookups are never cached.
+CACHE_MAX  = 4096
+CACHE      = OrderedDict()   # key -> (expires_at, orjson bytes)
+CACHE_LOCK = threading.Lock()
+
+REDIS_URL    = os.environ.get('REDIS_URL')
+REDIS_CLIENT = redis.Redis.from_url(REDIS_URL) if (redis and REDIS_URL) else None
+
+
+def store_local(key: str, raw: bytes, ttl: int):
+    """Put serialised bytes in the process-local cache, evicting the oldest."""
+    with CACHE_LOCK:
+        CACHE[key] = (time.monotonic() + ttl, raw)
+        CACHE.move_to_end(key)
+        while len(CACHE) > CACHE_MAX:
+            CACHE.popitem(last=False)
+
+
+def cache_get(key: str) -> Optional[object]:
+    """Return the cached value for key, or None on a miss."""
+    now = time.monotonic()
+    with CACHE_LOCK:
+        entry = CACHE.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                CACHE.move_to_end(key)
+                return orjson.loads(entry[1])
+            del CACHE[key]
+
+    if REDIS_CLIENT is not None:
+        try:
+            raw, ttl = REDIS_CLIENT.pipeline().get(key).ttl(key).execute()
+        except Exception as e:
+            print(f"Redis cache read error: {str(e)}")
+            return None
+        if raw is not None:
+            # Keep a local copy for as long as Redis still holds the entry
+            store_local(key, raw, ttl if ttl and ttl > 0 else 60)
+            return orjson.loads(raw)
+    return None
+
+
+def cache_set(key: str, value, ttl: int):
+    """Store a JSON-serialisable value under key for ttl seconds."""
+    # Stored serialised, so callers can never mutate a cached entry
+    raw = orjson.dumps(value)
+    store_local(key, raw, ttl)
+    if REDIS_CLIENT is not None:
+        try:
+            REDIS_CLIENT.setex(key, ttl, raw)
+        except Exception as e:
+            print(f"Redis cache write error: {str(e)}")
+
 
+# ─── Request coalescing ──────────────────────────────────────────────────────
+# A burst of calls about the same incident would otherwise all miss the cache
+# together and each go to Nominatim/Overpass. The first caller for a key does
+# the lookup; the others wait on its Future and get a copy of the result.
+INFLIGHT      = {}   # key -> Future of the lookup in progress
+INFLIGHT_LOCK = threading.Lock()
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+
+def coalesced(key: str, fn, *args):
+    """Run fn(*args), sharing one in-flight call among concurrent callers of key."""
+    with INFLIGHT_LOCK:
+        future = INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = INFLIGHT[key] = Future()
+
+    if not leader:
+        # Copy, so no two callers ever mutate the same dicts
+        return orjson.loads(orjson.dumps(future.result()))
+
+    try:
+        result = fn(*args)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with INFLIGHT_LOCK:
+            del INFLIGHT[key]
+
+
+def normalize_location(location: str) -> str:
+    """Cache-key form of a location string: lower-cased, whitespace collapsed."""
+    return ' '.join(location.lower().split())
+
+
+def haversine_distances(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray,
+                        cos_lat: Optional[float] = None) -> np.ndarray:
     """
-    Calculate the straight-line distance between two coordinates (in km)
-    using the Haversine formula.
+    Vectorised Haversine: distances (in km, unrounded) from one point to
+    arrays of coordinates, in a single NumPy pass instead of a Python loop.
+    cos_lat (cosine of lat) may be passed in when the caller already has it.
     """
     R = 6371  # Earth radius in km
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    return round(2 * R * math.asin(math.sqrt(a)), 1)
+    if cos_lat is None:
+        cos_lat = math.cos(math.radians(lat))
+    phi2 = np.radians(lats)   # converted once, used for dphi and cos(phi2)
+    dphi = phi2 - math.radians(lat)
+    dlambda = np.radians(lons - lon)
+    a = np.sin(dphi / 2) ** 2 + cos_lat * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+
+# ─── Hedged requests ─────────────────────────────────────────────────────────
+# Lookups race a second attempt against a slow first one instead of waiting
+# out its full timeout. Attempts that lose the race finish in the background
+# and their results are discarded. Each lookup kind has its own pool, sized
+# for its attempts x LOOKUP_CONCURRENCY lookups at once, so slow Overpass
+# mirrors holding threads for their full timeout never starve geocoding.
+LOOKUP_CONCURRENCY = int(os.environ.get('LOOKUP_CONCURRENCY', '8'))
+
+
+def hedged(pool: ThreadPoolExecutor, attempts: List[tuple], hedge_secs: float, deadline_secs: float):
+    """
+    Run attempts, a list of (label, fn, args), on pool as a hedged race: the next one
+    starts as soon as the current one fails, or when it has not answered
+    within hedge_secs. The whole race gives up after deadline_secs; attempts
+    still running then finish in the background and are ignored.
+
+    Returns:
+        The first successful result (raises the last error if all fail,
+        or requests.exceptions.Timeout at the deadline)
+    """
+    attempts   = iter(attempts)
+    pending    = {}   # future -> label
+    last_error = None
+    deadline   = time.monotonic() + deadline_secs
+
+    def launch_next():
+        attempt = next(attempts, None)
+        if attempt is not None:
+            label, fn, args = attempt
+            print(f"Trying {label}")
+            pending[pool.submit(fn, *args)] = label
+
+    launch_next()
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout(f"No answer within {deadline_secs}s")
+        done, _ = wait(pending, timeout=min(hedge_secs, remaining), return_when=FIRST_COMPLETED)
+        if not done:
+            launch_next()     # slow attempt: race the next one against it
+            continue
+
+        for future in done:
+            label = pending.pop(future)
+            try:
+                return future.result()
+            except requests.exceptions.Timeout as e:
+                print(f"Timeout with {label}, trying next...")
+                last_error = e
+            except Exception as e:
+                print(f"Error with {label}: {str(e)}")
+                last_error = e
+            launch_next()
+
+    raise last_error
+
+
+GEOCODE_TTL = 48 * 3600   # seconds
+
+# A second Nominatim attempt is started only after GEOCODE_HEDGE_SECS, which
+# keeps one lookup within Nominatim's one-request-per-second usage policy
+GEOCODE_HEDGE_SECS    = 1.5
+GEOCODE_TIMEOUT       = (2, 5)   # (connect, read) seconds
+GEOCODE_DEADLINE_SECS = 6        # total budget for both attempts
+GEOCODE_ATTEMPTS      = 2
+GEOCODE_POOL          = ThreadPoolExecutor(max_workers=GEOCODE_ATTEMPTS * LOOKUP_CONCURRENCY)
+
+
+def query_nominatim(location: str) -> Dict:
+    """
+    Run one Nominatim search for location.
+
+    Returns:
+        dict: Location data with coordinates (raises on any failure)
+    """
+    url = "https://nominatim.openstreetmap.org/search"
+    params = {
+        'q': location,
+        'format': 'json',
+        'limit': 1,
+        'addressdetails': 1
+    }
+    response = SESSION.get(url, params=params, timeout=GEOCODE_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+
+    if data:
+        result = data[0]
+        return {
+            'lat': float(result['lat']),
+            'lon': float(result['lon']),
+            'display_name': result['display_name'],
+            'found': True
+        }
+    return {'found': False, 'error': 'Location not found'}
 
 
 def geocode_location(location: str) -> Dict:
@@ -27,35 +251,126 @@ def geocode_location(location: str) -> Dict:
     Returns:
         dict: Location data with coordinates
     """
+    key = f"geo:v1:{normalize_location(location)}"
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
+    def lookup():
+        geocoded = hedged(GEOCODE_POOL, [("Nominatim", query_nominatim, (location,))] * GEOCODE_ATTEMPTS,
+                          GEOCODE_HEDGE_SECS, GEOCODE_DEADLINE_SECS)
+        cache_set(key, geocoded, GEOCODE_TTL)
+        return geocoded
+
     try:
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            'q': location,
-            'format': 'json',
-            'limit': 1,
-            'addressdetails': 1
-        }
-        headers = {'User-Agent': 'EmergencyCallAssistant/1.0'}
-
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if data:
-            result = data[0]
-            return {
-                'lat': float(result['lat']),
-                'lon': float(result['lon']),
-                'display_name': result['display_name'],
-                'found': True
-            }
-        return {'found': False, 'error': 'Location not found'}
+        return coalesced(key, lookup)
 
     except Exception as e:
         print(f"Geocoding error: {str(e)}")
         return {'found': False, 'error': str(e)}
 
 
+OVERPASS_URLS = [
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+    "https://maps.mail.ru/osm/tools/overpass/api/interpreter"
+]
+OVERPASS_POOL = ThreadPoolExecutor(max_workers=len(OVERPASS_URLS) * LOOKUP_CONCURRENCY)
+
+# Human-readable label for each amenity type
+TYPE_LABEL = {
+    'hospital':     'Hospital',
+    'clinic':       'Clinic',
+    'doctors':      'Clinic',
+    'police':       'Police Station',
+    'fire_station': 'Fire Station',
+}
+
+# Include clinics alongside the original amenity types. Unnamed features
+# are dropped anyway, so ["name"] keeps them out of the response entirely.
+# One regex clause per element type means the server runs two around:
+# searches instead of one per amenity.
+# Built once; only the search circle is filled in per lookup.
+OVERPASS_QUERY = """
+[out:json][timeout:20];
+(
+  node["amenity"~"^(hospital|clinic|doctors|police|fire_station)$"]["name"](around:{radius},{lat},{lon});
+  way["amenity"~"^(hospital|clinic)$"]["name"](around:{radius},{lat},{lon});
+);
+out center body;
+"""
+
+OVERPASS_TTL = 6 * 3600   # seconds
+
+# Seconds to wait on a mirror before also asking the next one
+OVERPASS_HEDGE_SECS = float(os.environ.get('OVERPASS_HEDGE_SECS', '4'))
+# Total budget for one nearby-services lookup across all mirrors
+OVERPASS_DEADLINE_SECS = float(os.environ.get('OVERPASS_DEADLINE_SECS', '30'))
+
+
+def query_overpass(overpass_url: str, query: str) -> List[Dict]:
+    """
+    Run one Overpass query against one mirror.
+
+    Returns:
+        list: Named services without distances (raises on any failure)
+    """
+    response = SESSION.post(
+        overpass_url,
+        data={'data': query},
+        timeout=25
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    services = []
+    for element in data.get('elements', []):
+        tags = element.get('tags', {})
+        name = tags.get('name', '').strip()
+        if not name:          # skip unnamed features
+            continue
+
+        amenity = tags.get('amenity', 'unknown')
+
+        # Resolve coordinates for nodes and ways
+        if element['type'] == 'node':
+            s_lat, s_lon = element['lat'], element['lon']
+        elif element['type'] == 'way' and 'center' in element:
+            s_lat, s_lon = element['center']['lat'], element['center']['lon']
+        else:
+            continue
+
+        services.append({
+            'type':        amenity,
+            'type_label':  TYPE_LABEL.get(amenity, amenity.replace('_', ' ').title()),
+            'name':        name,
+            'lat':         s_lat,
+            'lon':         s_lon
+        })
+    return services
+
+
+def fetch_emergency_services(lat: float, lon: float, radius: int) -> Optional[List[Dict]]:
+    """
+    Query Overpass for every named emergency service within radius metres.
+
+    Mirrors are hedged rather than tried strictly in turn: the next one is
+    started as soon as the current one fails, or when it has not answered
+    within OVERPASS_HEDGE_SECS. The first successful answer wins.
+
+    Returns:
+        list: Services without distances, or None if every server failed
+    """
+    query = OVERPASS_QUERY.format(radius=radius, lat=lat, lon=lon)
+
+    attempts = [(f"Overpass API: {url}", query_overpass, (url, query)) for url in OVERPASS_URLS]
+    try:
+        return hedged(OVERPASS_POOL, attempts, OVERPASS_HEDGE_SECS, OVERPASS_DEADLINE_SECS)
+    except Exception:
+        print("All Overpass API servers failed or timed out")
+        return None
+
+
 def find_nearby_emergency_services(lat: float, lon: float, radius: int = 5000) -> List[Dict]:
     """
     Find the 5 nearest real emergency help centres (hospitals, clinics,
@@ -69,93 +384,52 @@ def find_nearby_emergency_services(lat: float, lon: float, radius: int = 5000) -
     Returns:
         list: Up to 5 nearby services with distance_km field
     """
-    overpass_urls = [
-        "https://overpass-api.de/api/interpreter",
-        "https://overpass.kumi.systems/api/interpreter",
-        "https://maps.mail.ru/osm/tools/overpass/api/interpreter"
-    ]
-
-    # Include clinics alongside the original amenity types
-    query = f"""
-    [out:json][timeout:20];
-    (
-      node["amenity"="hospital"](around:{radius},{lat},{lon});
-      node["amenity"="clinic"](around:{radius},{lat},{lon});
-      node["amenity"="doctors"](around:{radius},{lat},{lon});
-      node["amenity"="police"](around:{radius},{lat},{lon});
-      node["amenity"="fire_station"](around:{radius},{lat},{lon});
-      way["amenity"="hospital"](around:{radius},{lat},{lon});
-      way["amenity"="clinic"](around:{radius},{lat},{lon});
-    );
-    out center body;
-    """
-
-    # Human-readable label for each amenity type
-    TYPE_LABEL = {
-        'hospital':     'Hospital',
-        'clinic':       'Clinic',
-        'doctors':      'Clinic',
-        'police':       'Police Station',
-        'fire_station': 'Fire Station',
-    }
-
-    for overpass_url in overpass_urls:
-        try:
-            print(f"Trying Overpass API: {overpass_url}")
-            response = requests.post(
-                overpass_url,
-                data={'data': query},
-                timeout=25,
-                headers={'User-Agent': 'EmergencyCallAssistant/1.0'}
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            services = []
-            for element in data.get('elements', []):
-                tags = element.get('tags', {})
-                name = tags.get('name', '').strip()
-                if not name:          # skip unnamed features
-                    continue
-
-                amenity = tags.get('amenity', 'unknown')
-
-                # Resolve coordinates for nodes and ways
-                if element['type'] == 'node':
-                    s_lat, s_lon = element['lat'], element['lon']
-                elif element['type'] == 'way' and 'center' in element:
-                    s_lat, s_lon = element['center']['lat'], element['center']['lon']
-                else:
-                    continue
-
-                dist_km = haversine_distance(lat, lon, s_lat, s_lon)
-
-                services.append({
-                    'type':        amenity,
-                    'type_label':  TYPE_LABEL.get(amenity, amenity.replace('_', ' ').title()),
-                    'name':        name,
-                    'lat':         s_lat,
-                    'lon':         s_lon,
-                    'distance_km': dist_km
-                })
-
-            # Sort by real-world distance and keep closest 5
-            services.sort(key=lambda x: x['distance_km'])
-            top5 = services[:5]
-
-            print(f"Found {len(services)} services, returning top 5 by distance")
-            return top5
-
-        except requests.exceptions.Timeout:
-            print(f"Timeout with {overpass_url}, trying next...")
-            time.sleep(1)
-            continue
-        except Exception as e:
-            print(f"Error with {overpass_url}: {str(e)}")
-            continue
-
-    print("All Overpass API servers failed or timed out")
-    return []
+    # Incidents within ~100 m of each other share one Overpass lookup; the
+    # candidate list is cached and distances are measured from the exact point
+    q_lat, q_lon = round(lat, 3), round(lon, 3)
+    key = f"osm:v1:{q_lat}:{q_lon}:{radius}"
+
+    def lookup():
+        fetched = fetch_emergency_services(q_lat, q_lon, radius)
+        if fetched is not None:
+            cache_set(key, fetched, OVERPASS_TTL)
+        return fetched
+
+    services = cache_get(key)
+    if services is None:
+        services = coalesced(key, lookup)
+        if services is None:
+            return []
+
+    lats = np.fromiter((sv['lat'] for sv in services), dtype=np.float64, count=len(services))
+    lons = np.fromiter((sv['lon'] for sv in services), dtype=np.float64, count=len(services))
+
+    # Bounding-box prefilter: only candidates inside the box around the search
+    # circle (1° latitude ≈ 111 km) reach the trigonometric Haversine
+    cos_lat  = math.cos(math.radians(lat))   # shared by the box and Haversine
+    max_dlat = radius / 111000
+    max_dlon = max_dlat / max(cos_lat, 1e-6)
+    inside   = np.flatnonzero((np.abs(lats - lat) <= max_dlat) & (np.abs(lons - lon) <= max_dlon))
+    dist     = haversine_distances(lat, lon, lats[inside], lons[inside], cos_lat)
+
+    # Closest 5 by real-world distance: O(n) partition, then sort just those
+    if len(dist) > 5:
+        nearest = np.argpartition(dist, 5)[:5]
+    else:
+        nearest = np.arange(len(dist))
+    nearest = nearest[np.argsort(dist[nearest], kind='stable')]
+
+    top5 = []
+    for i in nearest:
+        service = services[inside[i]]
+        service['distance_km'] = round(float(dist[i]), 1)
+        top5.append(service)
+
+    print(f"Found {len(services)} services, returning top 5 by distance")
+    return top5
+
+
+LOCATION_DATA_TTL = 24 * 3600   # seconds
 
 
 def get_location_data(location: str) -> Dict:
@@ -168,6 +442,12 @@ def get_location_data(location: str) -> Dict:
     Returns:
         dict: Complete location data
     """
+    # Repeat locations skip both lookups; the composed answer is cached whole
+    key = f"locpipe:v1:{hashlib.sha1(normalize_location(location).encode()).hexdigest()}"
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
     geocode_result = geocode_location(location)
 
     if not geocode_result.get('found'):
@@ -178,7 +458,7 @@ def get_location_data(location: str) -> Dict:
 
     services = find_nearby_emergency_services(lat, lon)
 
-    return {
+    location_data = {
         'found': True,
         'location': {
             'lat': lat,
@@ -186,4 +466,9 @@ def get_location_data(location: str) -> Dict:
             'display_name': geocode_result['display_name']
         },
         'emergency_services': services
-    }
\ No newline at end of file
+    }
+
+    # An empty list may mean every Overpass mirror failed, so only cache hits
+    if services:
+        cache_set(key, location_data, LOCATION_DATA_TTL)
+    return location_data
\ No newline at end of file
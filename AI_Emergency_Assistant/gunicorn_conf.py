@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for the Emergency Call App (port 5006).
+
+    gunicorn -c gunicorn_conf.py app:app
+
+Environment knobs:
+    GUNICORN_WORKERS      worker processes (default: half the CPU cores, min 2)
+    GUNICORN_THREADS      request threads per worker (default: 4)
+    PIPELINE_CONCURRENCY  files of one /upload analysed in parallel (see app.py)
+"""
+import os
+
+bind         = os.environ.get('GUNICORN_BIND', '0.0.0.0:5006')
+workers      = int(os.environ.get('GUNICORN_WORKERS', max(2, (os.cpu_count() or 2) // 2)))
+threads      = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# Long recordings can take minutes to transcribe on CPU
+timeout = 300
+
+# app.py opens its DB pool and loads the models at import time. Neither pooled
+# sockets nor a CUDA context survive a fork, so every worker imports app.py
+# itself instead of inheriting it from a preloaded master.
+preload_app = False
@@ -1,25 +1,96 @@
 import spacy
 import re
+import threading
+import ahocorasick
 
 # Load SpaCy model
 nlp = None
+# Only the NER component is used; skipping the rest roughly halves nlp(text)
+NLP_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+# Concurrent first requests must not each load (or download) the model
+load_lock = threading.Lock()
 
 
 def load_nlp_model():
     global nlp
-    if nlp is None:
-        print("Loading SpaCy NLP model...")
-        try:
-            nlp = spacy.load("en_core_web_sm")
-        except:
-            print("Downloading SpaCy model...")
-            import os
-            os.system("python -m spacy download en_core_web_sm")
-            nlp = spacy.load("en_core_web_sm")
-        print("SpaCy model loaded successfully!")
+    if nlp is not None:
+        return nlp
+    with load_lock:
+        if nlp is None:
+            print("Loading SpaCy NLP model...")
+            try:
+                model = spacy.load("en_core_web_sm", exclude=NLP_EXCLUDE)
+            except:
+                print("Downloading SpaCy model...")
+                import os
+                os.system("python -m spacy download en_core_web_sm")
+                model = spacy.load("en_core_web_sm", exclude=NLP_EXCLUDE)
+            nlp = model   # published only once fully loaded
+            print("SpaCy model loaded successfully!")
     return nlp
 
 
+# Emergency type keywords, in order of precedence
+EMERGENCY_KEYWORDS = {
+    'fire': ['fire', 'burning', 'smoke', 'flames'],
+    'medical': ['heart attack', 'stroke', 'injury', 'injured', 'bleeding', 'unconscious', 'breathing',
+                'chest pain', 'ambulance'],
+    'crime': ['robbery', 'theft', 'assault', 'shooting', 'gun', 'weapon', 'attack', 'violence', 'break in'],
+    'accident': ['accident', 'crash', 'collision', 'hit', 'vehicle'],
+    'disturbance': ['disturbance', 'noise', 'fight', 'argument', 'suspicious']
+}
+EMERGENCY_TYPES = list(EMERGENCY_KEYWORDS)
+
+# Priority keywords: 1 = Critical, 2 = High, anything else is Medium
+PRIORITY_KEYWORDS = {
+    1: ['fire', 'shooting', 'explosion', 'heart attack', 'stroke', 'dying', 'unconscious',
+        'severe bleeding'],
+    2: ['accident', 'injury', 'assault', 'robbery', 'chest pain'],
+}
+PRIORITY_LABELS = {1: 'Critical', 2: 'High'}
+NO_TYPE, NO_PRIORITY = len(EMERGENCY_TYPES), 3
+
+# Street address fallback when NER finds no place name. The bounded lazy
+# middle part stops at the first street suffix instead of backtracking
+# from the end of the transcript.
+ADDRESS_RE = re.compile(
+    r'\b\d+\s+[\w\s]{1,40}?\b(?:street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln|drive|dr|court|ct)\b',
+    re.IGNORECASE)
+
+# One Aho-Corasick automaton covers both tables; each keyword maps to
+# (emergency type rank, priority level) so a single pass over the text
+# yields both results
+KEYWORD_AUTOMATON = ahocorasick.Automaton()
+_keyword_tags = {}
+for _rank, _type in enumerate(EMERGENCY_TYPES):
+    for _kw in EMERGENCY_KEYWORDS[_type]:
+        _keyword_tags[_kw] = (_rank, NO_PRIORITY)
+for _level, _keywords in PRIORITY_KEYWORDS.items():
+    for _kw in _keywords:
+        _keyword_tags[_kw] = (_keyword_tags.get(_kw, (NO_TYPE,))[0], _level)
+for _kw, _tag in _keyword_tags.items():
+    KEYWORD_AUTOMATON.add_word(_kw, _tag)
+KEYWORD_AUTOMATON.make_automaton()
+
+
+def scan_keywords(text_lower):
+    """
+    Match every keyword in one pass.
+
+    Returns:
+        tuple: (emergency type or None, priority label)
+    """
+    type_rank, level = NO_TYPE, NO_PRIORITY
+    for _, (kw_rank, kw_level) in KEYWORD_AUTOMATON.iter(text_lower):
+        type_rank = min(type_rank, kw_rank)
+        level = min(level, kw_level)
+        if type_rank == 0 and level == 1:
+            break   # nothing later in the text can outrank this
+
+    emergency_type = EMERGENCY_TYPES[type_rank] if type_rank < NO_TYPE else None
+    return emergency_type, PRIORITY_LABELS.get(level, 'Medium')
+
+
 def extract_entities(text):
     """
     Extract important entities from text (only priority level, emergency type, and location)
@@ -47,50 +118,14 @@ def extract_entities(text):
                     entities['location'] = ent.text
                     break
 
-        # Extract emergency type using keywords
-        emergency_keywords = {
-            'fire': ['fire', 'burning', 'smoke', 'flames'],
-            'medical': ['heart attack', 'stroke', 'injury', 'injured', 'bleeding', 'unconscious', 'breathing',
-                        'chest pain', 'ambulance'],
-            'crime': ['robbery', 'theft', 'assault', 'shooting', 'gun', 'weapon', 'attack', 'violence', 'break in'],
-            'accident': ['accident', 'crash', 'collision', 'hit', 'vehicle'],
-            'disturbance': ['disturbance', 'noise', 'fight', 'argument', 'suspicious']
-        }
-
-        text_lower = text.lower()
-        for emergency_type, keywords in emergency_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    entities['emergency_type'] = emergency_type
-                    break
-            if entities['emergency_type']:
-                break
+        # Emergency type and priority level from one keyword pass
+        entities['emergency_type'], entities['priority_level'] = scan_keywords(text.lower())
 
         # Extract addresses using simple pattern (as alternative to location)
         if not entities['location']:
-            address_pattern = r'\d+\s+[\w\s]+(?:street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln|drive|dr|court|ct)'
-            addresses = re.findall(address_pattern, text, re.IGNORECASE)
-            if addresses:
-                entities['location'] = addresses[0]
-
-        # Determine priority level
-        critical_keywords = ['fire', 'shooting', 'explosion', 'heart attack', 'stroke', 'dying', 'unconscious',
-                             'severe bleeding']
-        high_keywords = ['accident', 'injury', 'assault', 'robbery', 'chest pain']
-
-        for keyword in critical_keywords:
-            if keyword in text_lower:
-                entities['priority_level'] = 'Critical'
-                break
-
-        if not entities['priority_level']:
-            for keyword in high_keywords:
-                if keyword in text_lower:
-                    entities['priority_level'] = 'High'
-                    break
-
-        if not entities['priority_level']:
-            entities['priority_level'] = 'Medium'
+            address = ADDRESS_RE.search(text)
+            if address:
+                entities['location'] = address.group()
 
         print(f"Extracted entities: {entities}")
         return entities
@@ -101,4 +136,4 @@ def extract_entities(text):
             'emergency_type': 'unknown',
             'priority_level': 'Medium',
             'location': None
-        }
\ No newline at end of file
+        }
\ No newline at end of file
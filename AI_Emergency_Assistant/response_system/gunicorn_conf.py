@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for the Emergency Response Center (port 5020).
+
+    gunicorn -c gunicorn_conf.py wsgi:application
+
+Environment knobs:
+    GUNICORN_WORKERS   worker processes (default: 2)
+    GUNICORN_THREADS   request threads per worker (default: 8)
+"""
+import os
+
+bind         = os.environ.get('GUNICORN_BIND', '0.0.0.0:5020')
+workers      = int(os.environ.get('GUNICORN_WORKERS', '2'))
+threads      = int(os.environ.get('GUNICORN_THREADS', '8'))
+worker_class = 'gthread'
+
+# Push delivery is network-bound, so a few workers with many threads go further
+# than many single-threaded processes
+timeout = 60
@@ -6,12 +6,47 @@ Storage: PostgreSQL (replaces JSON flat files)
 """
 
 from flask import Flask, render_template, request, jsonify, send_from_directory
-import json
+from flask.json.provider import JSONProvider
+import orjson
 import os
 import base64
-from datetime import datetime
+import functools
+import re
+import threading
+import queue
+import select
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
+import atexit
+
+
+# Same provider as in app.py. The response app is deployed on its own (own
+# requirements and gunicorn config) and importing app.py would load the ASR
+# and NLP models, so it keeps this small copy.
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (Rust, SIMD) instead of stdlib json."""
+
+    OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand the encoded bytes straight to the response, skipping a decode
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.OPTIONS),
+                                        mimetype='application/json')
+
 
 response_app = Flask(
     __name__,
@@ -19,6 +54,7 @@ response_app = Flask(
     static_folder='response_static',
     static_url_path='/response_static'
 )
+response_app.json = OrjsonProvider(response_app)
 
 # ─── File paths ───────────────────────────────────────────────────────────────
 BASE        = os.path.dirname(os.path.abspath(__file__))
@@ -37,9 +73,23 @@ DB_CONFIG = {
 }
 
 
+# Connections are reused across requests instead of reconnecting every time
+POOL = ThreadedConnectionPool(minconn=2, maxconn=20, **DB_CONFIG)
+atexit.register(POOL.closeall)
+
+
+@contextmanager
 def get_db():
-    """Open and return a new database connection."""
-    return psycopg2.connect(**DB_CONFIG)
+    """Borrow a pooled connection; commit on success, roll back on error."""
+    conn = POOL.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        POOL.putconn(conn)
 
 
 def init_db():
@@ -53,7 +103,7 @@ def init_db():
                     location      TEXT NOT NULL,
                     state         TEXT NOT NULL,
                     type          TEXT NOT NULL DEFAULT 'General',
-                    registered_at TEXT NOT NULL
+                    registered_at TIMESTAMPTZ NOT NULL DEFAULT now()
                 );
             """)
             cur.execute("""
@@ -78,89 +128,406 @@ def init_db():
                     filename        TEXT,
                     matched_centers JSONB,
                     play_sound      BOOLEAN DEFAULT TRUE,
-                    timestamp       TEXT NOT NULL
+                    timestamp       TIMESTAMPTZ NOT NULL DEFAULT now()
                 );
             """)
+            # Tables created before timestamps were stored as TIMESTAMPTZ
+            cur.execute("""
+                DO $$
+                BEGIN
+                    IF (SELECT data_type FROM information_schema.columns
+                        WHERE table_name = 'help_centers' AND column_name = 'registered_at') = 'text' THEN
+                        ALTER TABLE help_centers
+                            ALTER COLUMN registered_at TYPE TIMESTAMPTZ USING registered_at::timestamptz,
+                            ALTER COLUMN registered_at SET DEFAULT now();
+                    END IF;
+                    IF (SELECT data_type FROM information_schema.columns
+                        WHERE table_name = 'alerts_log' AND column_name = 'timestamp') = 'text' THEN
+                        ALTER TABLE alerts_log
+                            ALTER COLUMN timestamp TYPE TIMESTAMPTZ USING timestamp::timestamptz,
+                            ALTER COLUMN timestamp SET DEFAULT now();
+                    END IF;
+                END $$;
+            """)
+            # /alerts filters on the session start and returns the newest first
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS alerts_log_timestamp_idx
+                    ON alerts_log (timestamp DESC);
+            """)
+            # /alerts also filters on matched_centers @> '["<center>"]'
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS alerts_log_matched_centers_idx
+                    ON alerts_log USING GIN (matched_centers jsonb_path_ops);
+            """)
+            # fetch_subscriptions looks up the matched centers' subscriptions on every alert
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS push_subscriptions_center_name_idx
+                    ON push_subscriptions (center_name);
+            """)
         conn.commit()
     print('✅ PostgreSQL tables verified / created.')
 
 
 # ─── VAPID key generation ─────────────────────────────────────────────────────
 def get_or_generate_vapid():
-    """Generate VAPID keys once; reuse them on subsequent restarts."""
-    if os.path.exists(VAPID_PEM) and os.path.exists(VAPID_PUB):
-        with open(VAPID_PUB) as f:
-            return f.read().strip()
+    """
+    Generate VAPID keys once; reuse them on subsequent restarts.
 
+    Several gunicorn workers may start at once, so the private key is
+    published with an atomic hard link: the first worker's key wins and the
+    others load it. The public key is always derived from that private key,
+    and the .txt copy is rewritten atomically, so the two can never disagree.
+
+    Returns:
+        tuple: (public key as base64url, loaded Vapid key or None)
+    """
     try:
         from py_vapid import Vapid
         from cryptography.hazmat.primitives import serialization
 
-        vapid = Vapid()
-        vapid.generate_keys()
-        vapid.save_key(VAPID_PEM)
-
+        if not os.path.exists(VAPID_PEM):
+            vapid = Vapid()
+            vapid.generate_keys()
+            tmp_pem = f'{VAPID_PEM}.{os.getpid()}.tmp'
+            vapid.save_key(tmp_pem)
+            try:
+                os.link(tmp_pem, VAPID_PEM)   # fails if another worker got there first
+                print('✅ VAPID key pair generated.')
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_pem)
+
+        vapid = Vapid.from_file(VAPID_PEM)
         pub_bytes = vapid.public_key.public_bytes(
             encoding=serialization.Encoding.X962,
             format=serialization.PublicFormat.UncompressedPoint
         )
         pub_b64 = base64.urlsafe_b64encode(pub_bytes).rstrip(b'=').decode()
 
-        with open(VAPID_PUB, 'w') as f:
-            f.write(pub_b64)
+        stored = None
+        if os.path.exists(VAPID_PUB):
+            with open(VAPID_PUB) as f:
+                stored = f.read().strip()
+        if stored != pub_b64:
+            tmp_pub = f'{VAPID_PUB}.{os.getpid()}.tmp'
+            with open(tmp_pub, 'w') as f:
+                f.write(pub_b64)
+            os.replace(tmp_pub, VAPID_PUB)
+            print(f'✅ VAPID public key written: {pub_b64[:40]}...')
 
-        print(f'✅ VAPID public key generated: {pub_b64[:40]}...')
-        return pub_b64
+        return pub_b64, vapid
 
     except ImportError:
         print('⚠️  py-vapid / cryptography not installed. Push notifications disabled.')
         print('   Run: pip install pywebpush py-vapid --break-system-packages')
-        return 'NOT_CONFIGURED'
+        return 'NOT_CONFIGURED', None
     except Exception as e:
         print(f'⚠️  VAPID generation failed: {e}')
-        return 'NOT_CONFIGURED'
+        return 'NOT_CONFIGURED', None
 
 
-VAPID_PUBLIC_KEY = get_or_generate_vapid()
+# The parsed private key is reused for every push instead of webpush
+# reading and parsing the PEM file on each call
+VAPID_PUBLIC_KEY, VAPID_KEY = get_or_generate_vapid()
 
 # ─── Track server start time — only show alerts from this session ─────────────
-SERVER_START_TIME = datetime.now().isoformat()
+SERVER_START_TIME = datetime.now(timezone.utc)
 print(f'🕐 Server session started at: {SERVER_START_TIME}')
 
 # ─── Initialise DB tables on startup ─────────────────────────────────────────
 init_db()
 
 
+# ─── Help center cache ────────────────────────────────────────────────────────
+# Every alert needs the full center list, which only changes on /register.
+# Keep it in memory and drop it whenever /register (in any process) sends
+# NOTIFY help_centers_changed. CENTERS_TTL is only a safety net in case the
+# listener connection is down.
+# Alongside the list sits an inverted index word -> center positions, so
+# matching an alert costs one lookup per word instead of a scan of all centers.
+# Each snapshot also carries its own small LRU of match results, so a location
+# string that keeps coming up is matched once per snapshot and reused after that.
+CENTERS_TTL   = 300
+CENTERS_CACHE = {'centers': None, 'index': None, 'match': None, 'loaded_at': 0.0}
+CENTERS_LOCK  = threading.Lock()
+
+
+WORD_RE = re.compile(r'\w+')
+
+
+def location_words(text: str) -> set:
+    """Case-folded words of more than two characters in a location string."""
+    return {w for w in WORD_RE.findall((text or '').casefold()) if len(w) > 2}
+
+
+def centers_snapshot():
+    """Return (centers ordered by registration time, word index, matcher), cached."""
+    with CENTERS_LOCK:
+        if (CENTERS_CACHE['centers'] is not None
+                and time.monotonic() - CENTERS_CACHE['loaded_at'] < CENTERS_TTL):
+            return CENTERS_CACHE['centers'], CENTERS_CACHE['index'], CENTERS_CACHE['match']
+
+        with get_db() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("SELECT * FROM help_centers ORDER BY registered_at")
+                centers = [dict(r) for r in cur.fetchall()]
+
+        index = {}
+        for pos, center in enumerate(centers):
+            words = location_words(f"{center.get('location', '')} {center.get('state', '')}")
+            for word in words:
+                index.setdefault(word, set()).add(pos)
+
+        @functools.lru_cache(maxsize=512)
+        def match(location: str) -> tuple:
+            # Set intersection with the index keys drops unknown words in C,
+            # then the position sets of the known ones are unioned in one call
+            known = location_words(location) & index.keys()
+            if not known:
+                return ()
+            return tuple(sorted(set().union(*(index[word] for word in known))))
+
+        CENTERS_CACHE['centers']   = centers
+        CENTERS_CACHE['index']     = index
+        CENTERS_CACHE['match']     = match
+        CENTERS_CACHE['loaded_at'] = time.monotonic()
+        return centers, index, match
+
+
+def load_centers() -> list:
+    """Return all help centers ordered by registration time (cached)."""
+    return centers_snapshot()[0]
+
+
+def invalidate_centers():
+    """Force the next load_centers() call to re-read the table."""
+    with CENTERS_LOCK:
+        CENTERS_CACHE['centers'] = None
+
+
+def centers_listener():
+    """
+    Drop the center cache whenever any process sends NOTIFY help_centers_changed.
+    Runs on its own autocommit connection (LISTEN needs one that stays open).
+    """
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(**DB_CONFIG)
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("LISTEN help_centers_changed;")
+            invalidate_centers()   # anything may have changed while disconnected
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    invalidate_centers()
+        except Exception as e:
+            print(f'Help center listener error: {e} — reconnecting in 5s')
+            if conn is not None:
+                conn.close()
+            time.sleep(5)
+
+
+threading.Thread(target=centers_listener, daemon=True).start()
+
+
 # ─── Location matching ────────────────────────────────────────────────────────
-def location_matches(extracted_loc: str, center: dict) -> bool:
+def match_centers(extracted_loc: str) -> list:
     """
-    Return True if the extracted location overlaps with a help center's
-    registered location or state (case-insensitive word-level matching).
+    Return the help centers whose registered location or state shares a word
+    with the extracted location (case-insensitive word-level matching),
+    in registration order.
     """
     if not extracted_loc:
-        return False
+        return []
+
+    # Keyed on the raw string: a repeat costs one hash lookup, and only a
+    # miss pays for case-folding and tokenising it
+    centers, _, match = centers_snapshot()
+    return [centers[pos] for pos in match(extracted_loc)]
+
+
+# Centers of one alert are pushed to side by side, and so are the browsers
+# subscribed to each center; every push is mostly waiting on a push-service
+# round-trip. Separate pools, so a center never waits on its own pool for a slot.
+DISPATCH_POOL = ThreadPoolExecutor(max_workers=8)
+PUSH_POOL     = ThreadPoolExecutor(max_workers=32)
+
+# Keep-alive connections to the push services (FCM, Mozilla, ...), shared by
+# every push so a burst reuses TLS sessions instead of handshaking per browser.
+# One socket per PUSH_POOL thread and host.
+PUSH_SESSION = requests.Session()
+PUSH_SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+
+
+# ─── Dead subscription pruning ────────────────────────────────────────────────
+# Subscriptions rejected with 404/410 are deleted by a background thread, so
+# the alert request never waits on the DELETE. Ids arriving within
+# PRUNE_WINDOW seconds of each other are removed in one statement.
+PRUNE_Q      = queue.Queue()
+PRUNE_WINDOW = 0.5
+
+
+def prune_worker():
+    while True:
+        dead_ids = set(PRUNE_Q.get())
+        deadline = time.monotonic() + PRUNE_WINDOW
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                dead_ids.update(PRUNE_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            with get_db() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "DELETE FROM push_subscriptions WHERE id = ANY(%s)",
+                        (list(dead_ids),)
+                    )
+                conn.commit()
+            print(f'🧹 Pruned {len(dead_ids)} dead push subscription(s)')
+        except Exception as e:
+            print(f'Pruning dead subscriptions failed: {e}')
+
+
+threading.Thread(target=prune_worker, daemon=True).start()
+
 
-    loc_lower    = extracted_loc.lower().strip()
-    center_loc   = center.get('location', '').lower().strip()
-    center_state = center.get('state', '').lower().strip()
-    combined     = f'{center_loc} {center_state}'
+# ─── Alert log writer ─────────────────────────────────────────────────────────
+# alerts_log rows are written by a background thread instead of inside the
+# alert request. Rows queued within ALERT_LOG_WINDOW seconds of each other
+# (up to ALERT_LOG_BATCH) go to the database as one multi-row INSERT.
+# The alert has already been acknowledged by then, so a batch that fails to
+# write is kept and retried with backoff (new rows join it) until it lands.
+ALERT_LOG_Q           = queue.Queue()
+ALERT_LOG_BATCH       = 100
+ALERT_LOG_WINDOW      = 0.5
+ALERT_LOG_MAX_BACKOFF = 30
+ALERT_LOG_PENDING     = []   # rows taken off the queue but not written yet
+ALERT_LOG_LOCK        = threading.Lock()
 
-    for word in loc_lower.split():
-        if len(word) > 2 and word in combined:
-            return True
-    for word in combined.split():
-        if len(word) > 2 and word in loc_lower:
-            return True
 
-    return False
+def queue_alert_log(report: dict, matched_centers: list, timestamp: datetime):
+    """Queue one alerts_log row for the background writer."""
+    ALERT_LOG_Q.put((
+        report['title'], report['body'], report['priority'], report['priority_text'],
+        report['emergency_type'], report['location'], report['emotion'],
+        report['transcript'], report['filename'], orjson.dumps(matched_centers).decode(),
+        report['play_sound'], timestamp
+    ))
+
+
+def write_alert_rows(rows: list):
+    with get_db() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO alerts_log
+                    (title, body, priority, priority_text, emergency_type,
+                     location, emotion, transcript, filename, matched_centers, play_sound, timestamp)
+                VALUES %s
+            """, rows, page_size=500)
+        conn.commit()
+
+
+def write_alert_row(row: tuple) -> bool:
+    """
+    Write a single alerts_log row. Returns False if it is still waiting to be
+    written (transient error); a row the database rejects is dropped.
+    """
+    try:
+        write_alert_rows([row])
+    except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+        print(f'Dropping rejected alert log row "{row[0]}": {e}')
+    except Exception:
+        return False
+    return True
+
+
+def alert_log_worker():
+    backoff = ALERT_LOG_WINDOW
+    while True:
+        # With rows still held from a failed write, only pick up what arrives
+        rows     = [] if ALERT_LOG_PENDING else [ALERT_LOG_Q.get()]
+        deadline = time.monotonic() + ALERT_LOG_WINDOW
+        while len(rows) < ALERT_LOG_BATCH and (remaining := deadline - time.monotonic()) > 0:
+            try:
+                rows.append(ALERT_LOG_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        with ALERT_LOG_LOCK:
+            ALERT_LOG_PENDING.extend(rows)
+            error = None
+            try:
+                write_alert_rows(ALERT_LOG_PENDING)
+                ALERT_LOG_PENDING.clear()
+            except (psycopg2.DataError, psycopg2.IntegrityError):
+                # A malformed row would fail every retry: write row by row and
+                # drop only the rows the database rejects
+                ALERT_LOG_PENDING[:] = [row for row in ALERT_LOG_PENDING if not write_alert_row(row)]
+                if ALERT_LOG_PENDING:
+                    error = 'database unavailable'
+            except Exception as e:
+                error = e
+            pending = len(ALERT_LOG_PENDING)
+
+        if error is None:
+            backoff = ALERT_LOG_WINDOW
+        else:
+            print(f'Writing {pending} alert log row(s) failed, retrying in {backoff:.1f}s: {error}')
+            time.sleep(backoff)
+            backoff = min(backoff * 2, ALERT_LOG_MAX_BACKOFF)
+
+
+def flush_alert_log():
+    """Write whatever is still held or queued; runs at exit, before the pool closes."""
+    with ALERT_LOG_LOCK:
+        while True:
+            try:
+                ALERT_LOG_PENDING.append(ALERT_LOG_Q.get_nowait())
+            except queue.Empty:
+                break
+        if ALERT_LOG_PENDING:
+            write_alert_rows(ALERT_LOG_PENDING)
+            ALERT_LOG_PENDING.clear()
+
+
+threading.Thread(target=alert_log_worker, daemon=True).start()
+atexit.register(flush_alert_log)
 
 
 # ─── Push notification sender ─────────────────────────────────────────────────
-def send_push_to_center(center_name: str, payload: dict) -> int:
+def fetch_subscriptions(center_names: list) -> dict:
+    """
+    Load the push subscriptions of several centers with a single query.
+    Returns center_name -> list of rows (id, endpoint, p256dh, auth).
+    """
+    by_center = {name: [] for name in center_names}
+    with get_db() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            # Only the key fields, extracted server-side: no JSONB parsing per row
+            cur.execute("""
+                SELECT id, center_name, endpoint,
+                       subscription->'keys'->>'p256dh' AS p256dh,
+                       subscription->'keys'->>'auth'   AS auth
+                FROM push_subscriptions WHERE center_name = ANY(%s)
+            """, (list(center_names),))
+            for row in cur.fetchall():
+                by_center[row['center_name']].append(row)
+    return by_center
+
+
+def send_push_to_center(center_name: str, payload: dict, rows: list) -> int:
     """
     Send a Web Push notification to every subscribed browser for center_name.
+    rows are the center's subscriptions, as returned by fetch_subscriptions.
     Returns the number of successful pushes.
-    Prunes dead subscriptions (410 / 404) from the database automatically.
+    Dead subscriptions (410 / 404) are queued for pruning from the database.
     """
     try:
         from pywebpush import webpush, WebPushException
@@ -168,51 +535,41 @@ def send_push_to_center(center_name: str, payload: dict) -> int:
         print('pywebpush not installed – skipping push')
         return 0
 
-    if not os.path.exists(VAPID_PEM):
+    if VAPID_KEY is None:
         print('VAPID private key missing – skipping push')
         return 0
 
-    # Fetch subscriptions for this center
-    with get_db() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(
-                "SELECT id, endpoint, subscription FROM push_subscriptions WHERE center_name = %s",
-                (center_name,)
-            )
-            rows = cur.fetchall()
-
     if not rows:
         print(f'No push subscriptions for "{center_name}"')
         return 0
 
-    sent         = 0
-    dead_ids     = []
-    payload_str  = json.dumps(payload)
+    payload_str  = orjson.dumps(payload)   # bytes; webpush encrypts them as-is
 
-    for row in rows:
+    def push_one(row):
+        """Push to one browser. Returns (delivered, id of a dead subscription or None)."""
         try:
             webpush(
-                subscription_info=dict(row['subscription']),
+                subscription_info={'endpoint': row['endpoint'],
+                                   'keys': {'p256dh': row['p256dh'], 'auth': row['auth']}},
                 data=payload_str,
-                vapid_private_key=VAPID_PEM,
-                vapid_claims={'sub': VAPID_EMAIL}
+                vapid_private_key=VAPID_KEY,
+                vapid_claims={'sub': VAPID_EMAIL},
+                requests_session=PUSH_SESSION
             )
-            sent += 1
+            return True, None
         except Exception as e:
             err = str(e)
             print(f'Push failed: {err}')
-            if '410' in err or '404' in err:
-                dead_ids.append(row['id'])
+            return False, row['id'] if ('410' in err or '404' in err) else None
 
-    # Prune dead subscriptions
+    # All browsers of the center are pushed to at once
+    results  = list(PUSH_POOL.map(push_one, rows))
+    sent     = sum(delivered for delivered, _ in results)
+    dead_ids = [dead_id for _, dead_id in results if dead_id is not None]
+
+    # Prune dead subscriptions (in the background)
     if dead_ids:
-        with get_db() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "DELETE FROM push_subscriptions WHERE id = ANY(%s)",
-                    (dead_ids,)
-                )
-            conn.commit()
+        PRUNE_Q.put(dead_ids)
 
     return sent
 
@@ -232,11 +589,7 @@ def index():
 
 @response_app.route('/centers', methods=['GET'])
 def get_centers():
-    with get_db() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM help_centers ORDER BY registered_at")
-            centers = [dict(r) for r in cur.fetchall()]
-    return jsonify(centers)
+    return jsonify(load_centers())
 
 
 @response_app.route('/register', methods=['POST'])
@@ -251,22 +604,26 @@ def register_center():
         return jsonify({'error': 'Name, location, and state are required'}), 400
 
     center_id = f'center_{int(datetime.now().timestamp())}'
-    now       = datetime.now().isoformat()
 
     try:
         with get_db() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
-                    INSERT INTO help_centers (id, name, location, state, type, registered_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (center_id, name, location, state, ctype, now))
+                    INSERT INTO help_centers (id, name, location, state, type)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING registered_at
+                """, (center_id, name, location, state, ctype))
+                registered_at = cur.fetchone()[0]
+                # Delivered on commit to every worker's centers_listener
+                cur.execute("NOTIFY help_centers_changed;")
             conn.commit()
     except psycopg2.errors.UniqueViolation:
         return jsonify({'error': 'A center with this name already exists'}), 409
+    invalidate_centers()
 
     new_center = {
         'id': center_id, 'name': name, 'location': location,
-        'state': state, 'type': ctype, 'registered_at': now
+        'state': state, 'type': ctype, 'registered_at': registered_at
     }
     return jsonify({'success': True, 'center': new_center})
 
@@ -289,7 +646,7 @@ def subscribe():
                 INSERT INTO push_subscriptions (center_name, endpoint, subscription)
                 VALUES (%s, %s, %s)
                 ON CONFLICT (endpoint) DO NOTHING
-            """, (center_name, endpoint, json.dumps(subscription)))
+            """, (center_name, endpoint, orjson.dumps(subscription).decode()))
         conn.commit()
 
     return jsonify({'success': True})
@@ -329,37 +686,17 @@ def receive_alert():
         'emotion':        emotion,
         'transcript':     transcript,
         'filename':       filename,
-        'timestamp':      datetime.now().isoformat(),
+        'timestamp':      datetime.now(timezone.utc),
         'play_sound':     True
     }
 
-    # Fetch all centers and find matches
-    with get_db() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM help_centers")
-            centers = [dict(r) for r in cur.fetchall()]
-
-    matched  = [c for c in centers if location_matches(extracted_location, c)]
-    targets  = matched
-
-    now_iso  = datetime.now().isoformat()
+    # Find matching centers among all registered ones
+    targets  = match_centers(extracted_location)
 
     if not targets:
         print(f'⚠️  No matching center found for location: "{extracted_location}" — alert not sent')
         # Still log the alert with empty matched_centers
-        with get_db() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO alerts_log
-                        (title, body, priority, priority_text, emergency_type,
-                         location, emotion, transcript, filename, matched_centers, play_sound, timestamp)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    report['title'], report['body'], priority, priority_text,
-                    emergency_type, extracted_location, emotion, transcript,
-                    filename, json.dumps([]), True, now_iso
-                ))
-            conn.commit()
+        queue_alert_log(report, [], report['timestamp'])
 
         return jsonify({
             'success':            True,
@@ -370,27 +707,14 @@ def receive_alert():
             'message':            f'No registered center found for location: "{extracted_location or "unknown"}"'
         })
 
-    total_sent       = 0
-    notified_centers = []
-    for center in targets:
-        sent = send_push_to_center(center['name'], report)
-        total_sent += sent
-        notified_centers.append(center['name'])
+    notified_centers = [center['name'] for center in targets]
+    subscriptions    = fetch_subscriptions(notified_centers)   # one query for all centers
+    total_sent       = sum(DISPATCH_POOL.map(
+        lambda name: send_push_to_center(name, report, subscriptions[name]), notified_centers
+    ))
 
     # Persist alert log
-    with get_db() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO alerts_log
-                    (title, body, priority, priority_text, emergency_type,
-                     location, emotion, transcript, filename, matched_centers, play_sound, timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                report['title'], report['body'], priority, priority_text,
-                emergency_type, extracted_location, emotion, transcript,
-                filename, json.dumps(notified_centers), True, now_iso
-            ))
-        conn.commit()
+    queue_alert_log(report, notified_centers, report['timestamp'])
 
     print(f'📢 Alert dispatched to: {notified_centers}, push sent: {total_sent}')
     return jsonify({
@@ -417,7 +741,7 @@ def get_alerts():
                       AND matched_centers @> %s::jsonb
                     ORDER BY timestamp DESC
                     LIMIT 20
-                """, (SERVER_START_TIME, json.dumps([center])))
+                """, (SERVER_START_TIME, orjson.dumps([center]).decode()))
             else:
                 cur.execute("""
                     SELECT * FROM alerts_log
@@ -434,4 +758,5 @@ def get_alerts():
 if __name__ == '__main__':
     print('🚑 Emergency Response Center starting on port 5020')
     print(f'🔑 VAPID key: {VAPID_PUBLIC_KEY[:40]}...' if len(VAPID_PUBLIC_KEY) > 40 else f'🔑 VAPID key: {VAPID_PUBLIC_KEY}')
-    response_app.run(debug=True, port=5020, host='0.0.0.0')
+    # Development server only; use `gunicorn -c gunicorn_conf.py wsgi:application` in production
+    response_app.run(port=5020, host='0.0.0.0')
@@ -0,0 +1,6 @@
+"""
+WSGI entry point for the Emergency Response Center (port 5020).
+
+    gunicorn -c gunicorn_conf.py wsgi:application
+"""
+from response_app import response_app as application
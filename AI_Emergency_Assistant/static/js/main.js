@@ -185,6 +185,8 @@ async function displayResults(results) {
         // ── NEW: Alert notification banner ──────────────────────────────────
         if (result.alert_sent) {
             cardContainer.appendChild(createAlertBanner(result));
+        } else if (result.notify_pending) {
+            pollAlertStatus(result, cardContainer);
         }
 
         if (result.entities && result.entities.location) {
@@ -198,6 +200,27 @@ async function displayResults(results) {
     }
 }
 
+// ─── Poll the background notification until the response app answers ────────
+async function pollAlertStatus(result, cardContainer, attempts = 15) {
+    for (let i = 0; i < attempts; i++) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        try {
+            const response = await fetch(`/notify_status/${result.file_hash}`);
+            if (!response.ok) return;
+            const status = await response.json();
+            if (status.pending) continue;
+            if (status.alert_sent) {
+                const banner = createAlertBanner({ ...result, ...status });
+                cardContainer.insertBefore(banner, cardContainer.children[1] || null);
+            }
+            return;
+        } catch (error) {
+            console.error('Notification status error:', error);
+            return;
+        }
+    }
+}
+
 // ─── NEW: Build the "alert sent" banner ─────────────────────────────────────
 function createAlertBanner(result) {
     const banner = document.createElement('div');
@@ -412,4 +435,4 @@ async function showMapForResult(location, index) {
         const section = document.getElementById(mapSectionId);
         if (section) section.style.display = 'none';
     }
-}
\ No newline at end of file
+}
\ No newline at end of file